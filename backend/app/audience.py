@@ -0,0 +1,150 @@
+import asyncio
+from typing import Dict, Iterable, List, Set
+
+from beanie.operators import In
+from bson import ObjectId
+from pymongo import UpdateOne
+
+from app.database import get_collection, init_db
+from models.herd import Herd
+from models.reflection import Reflection
+
+# Every reflection stores its resolved audience: the author, any friends it
+# was shared with, the herds it was shared with and those herds' members.
+# The field is multikey-indexed, so both "may this user see it" and "what is
+# in this user's feed" are a single {"audience": user_id} query.
+
+BACKFILL_BATCH_SIZE = 500
+
+# Reflections written before audiences existed (or saved with an empty one).
+# Every real audience contains at least the author.
+MISSING_AUDIENCE = {"$or": [{"audience": None}, {"audience": []}]}
+
+
+def _object_ids(ids: Iterable[str]) -> List[ObjectId]:
+    return [ObjectId(i) for i in ids or [] if ObjectId.is_valid(str(i))]
+
+
+def shared_herd_ids(shared_with_type: str, shared_with_ids: Iterable[str]) -> List[ObjectId]:
+    return _object_ids(shared_with_ids) if shared_with_type == "herd" else []
+
+
+async def load_herds(herd_ids: Iterable[ObjectId]) -> Dict[ObjectId, Herd]:
+    herd_ids = list(set(herd_ids))
+    if not herd_ids:
+        return {}
+    herds = await Herd.find(In(Herd.id, herd_ids)).to_list()
+    return {herd.id: herd for herd in herds}
+
+
+def build_audience(user_id: ObjectId, shared_with_type: str, shared_with_ids: Iterable[str], herds: Dict[ObjectId, Herd]) -> List[ObjectId]:
+    audience = [user_id]
+    if shared_with_type == "friend":
+        audience.extend(_object_ids(shared_with_ids))
+    for herd_id in shared_herd_ids(shared_with_type, shared_with_ids):
+        herd = herds.get(herd_id)
+        if herd:
+            audience.append(herd_id)
+            audience.extend(herd.member_ids)
+    return list(dict.fromkeys(audience))
+
+
+async def refresh_reflection_audience(reflection: Reflection):
+    """Re-resolve a herd share after insert. A membership change that lands
+    between resolving the audience and inserting the reflection would
+    otherwise be missed by sync_herd_audience."""
+    herds = await load_herds(shared_herd_ids(reflection.sharedWithType, reflection.sharedWithIds))
+    audience = build_audience(reflection.userId, reflection.sharedWithType, reflection.sharedWithIds, herds)
+    added = [member_id for member_id in audience if member_id not in reflection.audience]
+    revoked = [member_id for member_id in reflection.audience if member_id not in audience]
+
+    reflections = await get_collection(Reflection.Settings.name)
+    if added:
+        await reflections.update_one({"_id": reflection.id}, {"$addToSet": {"audience": {"$each": added}}})
+    if revoked:
+        await reflections.update_one({"_id": reflection.id}, {"$pull": {"audience": {"$in": revoked}}})
+    reflection.audience = audience
+
+
+async def _revoke(herd_id: ObjectId, removed: Set[ObjectId], batch_size: int = BACKFILL_BATCH_SIZE):
+    # A removed member keeps access to a reflection they authored, were
+    # shared with directly, or can still reach through another herd.
+    reflections = await get_collection(Reflection.Settings.name)
+    cursor = reflections.find(
+        {"$and": [{"audience": herd_id}, {"audience": {"$in": list(removed)}}]},
+        {"userId": 1, "sharedWithType": 1, "sharedWithIds": 1},
+        batch_size=batch_size,
+    )
+    while batch := await cursor.to_list(length=batch_size):
+        herds = await load_herds(
+            h for doc in batch for h in shared_herd_ids(doc.get("sharedWithType"), doc.get("sharedWithIds"))
+        )
+        operations = []
+        for doc in batch:
+            retained = set(build_audience(doc["userId"], doc.get("sharedWithType"), doc.get("sharedWithIds"), herds))
+            revoked = [member_id for member_id in removed if member_id not in retained]
+            if revoked:
+                operations.append(UpdateOne({"_id": doc["_id"]}, {"$pull": {"audience": {"$in": revoked}}}))
+        if operations:
+            await reflections.bulk_write(operations, ordered=False)
+
+
+async def sync_herd_audience(herd_id: ObjectId, previous_member_ids: Iterable[ObjectId], member_ids: Iterable[ObjectId]):
+    """Propagate a herd membership change to the reflections shared with it.
+    Call after the herd has been saved."""
+    previous_member_ids, member_ids = set(previous_member_ids), set(member_ids)
+    added = member_ids - previous_member_ids
+    removed = previous_member_ids - member_ids
+
+    reflections = await get_collection(Reflection.Settings.name)
+    if added:
+        await reflections.update_many({"audience": herd_id}, {"$addToSet": {"audience": {"$each": list(added)}}})
+    if removed:
+        await _revoke(herd_id, removed)
+
+
+async def drop_herd_audience(herd: Herd):
+    """Remove a deleted herd and the access it granted. Call after delete."""
+    await sync_herd_audience(herd.id, herd.member_ids, [])
+    reflections = await get_collection(Reflection.Settings.name)
+    await reflections.update_many({"audience": herd.id}, {"$pull": {"audience": herd.id}})
+
+
+async def backfill_audiences(batch_size: int = BACKFILL_BATCH_SIZE, missing_only: bool = False):
+    """Resolve and store the audience of existing reflections; all of them,
+    or with ``missing_only`` just those that have none yet."""
+    reflections = await get_collection(Reflection.Settings.name)
+    query = MISSING_AUDIENCE if missing_only else {}
+    cursor = reflections.find(query, {"userId": 1, "sharedWithType": 1, "sharedWithIds": 1}, batch_size=batch_size)
+    updated = 0
+    while batch := await cursor.to_list(length=batch_size):
+        herds = await load_herds(
+            h for doc in batch for h in shared_herd_ids(doc.get("sharedWithType"), doc.get("sharedWithIds"))
+        )
+        await reflections.bulk_write([
+            UpdateOne(
+                {"_id": doc["_id"]},
+                {"$set": {"audience": build_audience(doc["userId"], doc.get("sharedWithType"), doc.get("sharedWithIds"), herds)}},
+            )
+            for doc in batch
+        ], ordered=False)
+        updated += len(batch)
+    return {"reflections": updated}
+
+
+async def ensure_audiences():
+    """Startup migration: the feed and detail queries only match reflections
+    with an audience, so backfill any that predate it before serving."""
+    reflections = await get_collection(Reflection.Settings.name)
+    if await reflections.find_one(MISSING_AUDIENCE, {"_id": 1}):
+        return await backfill_audiences(missing_only=True)
+    return {"reflections": 0}
+
+
+async def _main():
+    await init_db()
+    return await backfill_audiences()
+
+
+if __name__ == "__main__":
+    print(asyncio.run(_main()))
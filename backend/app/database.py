@@ -6,6 +6,7 @@ from models.herd import Herd
 from models.reflection import Reflection, Reaction
 from models.friend import Friend
 from models.notification import Notification
+from models.activity import UserActivity, HerdActivity
 
 client = AsyncIOMotorClient(settings.MONGODB_URI)
 db = client.get_database("bright-wolf-hop")
@@ -22,7 +23,9 @@ async def init_db():
             Reflection,
             Friend,
             Reaction,
-            Notification
+            Notification,
+            UserActivity,
+            HerdActivity
         ]
     )
 
@@ -0,0 +1,235 @@
+import asyncio
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List
+
+from bson import ObjectId
+from pymongo import ReplaceOne, UpdateOne
+
+from app.audience import load_herds, shared_herd_ids
+from app.database import get_collection
+from models.activity import UserActivity, HerdActivity
+from models.herd import Herd
+from models.reflection import Reflection, Reaction
+
+BACKFILL_BATCH_SIZE = 500
+
+# Rollups only keep recent history so they stay one small document; streaks
+# are tracked separately and do not depend on it.
+DAILY_WINDOW_DAYS = 30
+WEEKLY_WINDOW_WEEKS = 26
+
+
+def day_key(moment: datetime) -> str:
+    return moment.strftime("%Y-%m-%d")
+
+
+def week_key(moment: datetime) -> str:
+    return moment.strftime("%G-W%V")
+
+
+def daily_cutoff(moment: datetime) -> str:
+    return day_key(moment - timedelta(days=DAILY_WINDOW_DAYS - 1))
+
+
+def weekly_cutoff(moment: datetime) -> str:
+    return week_key(moment - timedelta(weeks=WEEKLY_WINDOW_WEEKS - 1))
+
+
+def _keys_since(field: str, cutoff: str) -> dict:
+    # Drops entries of a date-keyed counter map older than ``cutoff``.
+    return {"$arrayToObject": {"$filter": {
+        "input": {"$objectToArray": {"$ifNull": [f"${field}", {}]}},
+        "cond": {"$gte": ["$$this.k", cutoff]},
+    }}}
+
+
+def trim_windows(moment: datetime, daily: bool = True) -> dict:
+    windows = {"weeklyCounts": _keys_since("weeklyCounts", weekly_cutoff(moment))}
+    if daily:
+        windows["dailyCounts"] = _keys_since("dailyCounts", daily_cutoff(moment))
+    return {"$set": windows}
+
+
+def trim_counts(counts: Dict[str, int], cutoff: str) -> Dict[str, int]:
+    return {key: count for key, count in counts.items() if key >= cutoff}
+
+
+def streak_pipeline(day: str, previous_day: str) -> list:
+    # Runs server-side so concurrent posts by the same user cannot race.
+    return [
+        {"$set": {"currentStreak": {"$switch": {
+            "branches": [
+                {"case": {"$gte": ["$lastReflectionDay", day]}, "then": "$currentStreak"},
+                {"case": {"$eq": ["$lastReflectionDay", previous_day]}, "then": {"$add": ["$currentStreak", 1]}},
+            ],
+            "default": 1,
+        }}}},
+        {"$set": {
+            "longestStreak": {"$max": [{"$ifNull": ["$longestStreak", 0]}, "$currentStreak"]},
+            "lastReflectionDay": {"$max": ["$lastReflectionDay", day]},
+        }},
+    ]
+
+
+def counted_herd_ids(user_id: ObjectId, shared_with_type: str, shared_with_ids: Iterable[str], herds: Dict[ObjectId, Herd]) -> List[ObjectId]:
+    # Only herds that exist and that the author belongs to get credit, so a
+    # stale or made-up share cannot create or inflate a herd rollup.
+    return [
+        herd_id for herd_id in shared_herd_ids(shared_with_type, shared_with_ids)
+        if herd_id in herds and user_id in herds[herd_id].member_ids
+    ]
+
+
+async def record_reflection(reflection: Reflection, herds: Dict[ObjectId, Herd]):
+    """``herds`` holds the loaded herds the reflection was shared with."""
+    day = day_key(reflection.createdAt)
+    week = week_key(reflection.createdAt)
+
+    users = await get_collection(UserActivity.Settings.name)
+    await users.update_one(
+        {"_id": reflection.userId},
+        {"$inc": {"reflectionCount": 1, f"dailyCounts.{day}": 1, f"weeklyCounts.{week}": 1}},
+        upsert=True,
+    )
+    await users.update_one(
+        {"_id": reflection.userId},
+        streak_pipeline(day, day_key(reflection.createdAt - timedelta(days=1))) + [trim_windows(reflection.createdAt)],
+    )
+
+    herd_ids = counted_herd_ids(reflection.userId, reflection.sharedWithType, reflection.sharedWithIds, herds)
+    if herd_ids:
+        operations = []
+        for herd_id in herd_ids:
+            operations.append(UpdateOne(
+                {"_id": herd_id},
+                {
+                    "$inc": {"reflectionCount": 1, f"postsByMember.{reflection.userId}": 1, f"weeklyCounts.{week}": 1},
+                    "$max": {"lastActivityAt": reflection.createdAt},
+                },
+                upsert=True,
+            ))
+            operations.append(UpdateOne({"_id": herd_id}, [trim_windows(reflection.createdAt, daily=False)]))
+        await (await get_collection(HerdActivity.Settings.name)).bulk_write(operations)
+
+
+async def record_reaction(reflection: Reflection, reaction: Reaction):
+    users = await get_collection(UserActivity.Settings.name)
+    await users.bulk_write([
+        UpdateOne({"_id": reaction.userId}, {"$inc": {"reactionsGiven": 1}}, upsert=True),
+        UpdateOne({"_id": reflection.userId}, {"$inc": {"reactionsReceived": 1}}, upsert=True),
+    ])
+
+    # A deleted herd is pulled from the audience; never recreate its rollup.
+    herd_ids = [
+        herd_id for herd_id in shared_herd_ids(reflection.sharedWithType, reflection.sharedWithIds)
+        if herd_id in reflection.audience
+    ]
+    if herd_ids:
+        herds = await get_collection(HerdActivity.Settings.name)
+        await herds.bulk_write([
+            UpdateOne({"_id": herd_id}, {"$inc": {"reactionCount": 1}, "$max": {"lastActivityAt": reaction.createdAt}})
+            for herd_id in herd_ids
+        ], ordered=False)
+
+
+def compute_streaks(days: Iterable[str]) -> Dict[str, object]:
+    current = longest = 0
+    previous = None
+    for day in sorted(days):
+        moment = datetime.strptime(day, "%Y-%m-%d")
+        current = current + 1 if previous is not None and moment - previous == timedelta(days=1) else 1
+        longest = max(longest, current)
+        previous = moment
+    return {
+        "currentStreak": current,
+        "longestStreak": longest,
+        "lastReflectionDay": day_key(previous) if previous else None,
+    }
+
+
+async def _write_in_batches(collection, operations: list, batch_size: int):
+    for start in range(0, len(operations), batch_size):
+        await collection.bulk_write(operations[start:start + batch_size], ordered=False)
+
+
+async def backfill_rollups(batch_size: int = BACKFILL_BATCH_SIZE):
+    """Rebuild every rollup document from the reflections and reactions
+    collections. Existing rollups are replaced, so run it before enabling the
+    live counters or during a quiet window; writes made mid-run can be lost."""
+    reflections = await get_collection(Reflection.Settings.name)
+    reactions = await get_collection(Reaction.Settings.name)
+
+    user_stats = defaultdict(lambda: {
+        "reflectionCount": 0, "reactionsGiven": 0, "reactionsReceived": 0,
+        "dailyCounts": defaultdict(int), "weeklyCounts": defaultdict(int),
+    })
+    herd_stats = defaultdict(lambda: {
+        "reflectionCount": 0, "reactionCount": 0, "postsByMember": defaultdict(int),
+        "weeklyCounts": defaultdict(int), "lastActivityAt": None,
+    })
+
+    def touch(herd: dict, moment: datetime):
+        if herd["lastActivityAt"] is None or moment > herd["lastActivityAt"]:
+            herd["lastActivityAt"] = moment
+
+    async def herds_for(docs: list) -> Dict[ObjectId, Herd]:
+        return await load_herds(
+            h for doc in docs for h in shared_herd_ids(doc.get("sharedWithType"), doc.get("sharedWithIds"))
+        )
+
+    projection = {"userId": 1, "createdAt": 1, "sharedWithType": 1, "sharedWithIds": 1}
+    cursor = reflections.find({}, projection, batch_size=batch_size)
+    while batch := await cursor.to_list(length=batch_size):
+        herds = await herds_for(batch)
+        for doc in batch:
+            stats = user_stats[doc["userId"]]
+            stats["reflectionCount"] += 1
+            stats["dailyCounts"][day_key(doc["createdAt"])] += 1
+            stats["weeklyCounts"][week_key(doc["createdAt"])] += 1
+            for herd_id in counted_herd_ids(doc["userId"], doc.get("sharedWithType"), doc.get("sharedWithIds"), herds):
+                herd = herd_stats[herd_id]
+                herd["reflectionCount"] += 1
+                herd["postsByMember"][str(doc["userId"])] += 1
+                herd["weeklyCounts"][week_key(doc["createdAt"])] += 1
+                touch(herd, doc["createdAt"])
+
+    cursor = reactions.find({}, {"reflectionId": 1, "userId": 1, "createdAt": 1}, batch_size=batch_size)
+    while batch := await cursor.to_list(length=batch_size):
+        targets = {
+            doc["_id"]: doc
+            async for doc in reflections.find(
+                {"_id": {"$in": list({r["reflectionId"] for r in batch})}},
+                {"userId": 1, "sharedWithType": 1, "sharedWithIds": 1},
+            )
+        }
+        herds = await herds_for(targets.values())
+        for reaction in batch:
+            user_stats[reaction["userId"]]["reactionsGiven"] += 1
+            target = targets.get(reaction["reflectionId"])
+            if not target:
+                continue
+            user_stats[target["userId"]]["reactionsReceived"] += 1
+            for herd_id in counted_herd_ids(target["userId"], target.get("sharedWithType"), target.get("sharedWithIds"), herds):
+                herd_stats[herd_id]["reactionCount"] += 1
+                touch(herd_stats[herd_id], reaction["createdAt"])
+
+    now = datetime.utcnow()
+    user_ops = []
+    for user_id, stats in user_stats.items():
+        streaks = compute_streaks(stats["dailyCounts"])
+        stats["dailyCounts"] = trim_counts(stats["dailyCounts"], daily_cutoff(now))
+        stats["weeklyCounts"] = trim_counts(stats["weeklyCounts"], weekly_cutoff(now))
+        user_ops.append(ReplaceOne({"_id": user_id}, {**stats, **streaks}, upsert=True))
+    herd_ops = []
+    for herd_id, stats in herd_stats.items():
+        stats["weeklyCounts"] = trim_counts(stats["weeklyCounts"], weekly_cutoff(now))
+        herd_ops.append(ReplaceOne({"_id": herd_id}, stats, upsert=True))
+
+    await _write_in_batches(await get_collection(UserActivity.Settings.name), user_ops, batch_size)
+    await _write_in_batches(await get_collection(HerdActivity.Settings.name), herd_ops, batch_size)
+    return {"users": len(user_ops), "herds": len(herd_ops)}
+
+
+if __name__ == "__main__":
+    print(asyncio.run(backfill_rollups()))
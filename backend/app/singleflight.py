@@ -0,0 +1,123 @@
+import asyncio
+from collections import defaultdict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Type
+
+from beanie import Document
+from bson import json_util
+
+from core.config import settings
+
+# Concurrent identical reads share one in-flight Mongo call. When a herd
+# posts, every member's client refreshes at once and would otherwise run the
+# same Herd.get / User.find queries side by side.
+
+
+class SingleFlight:
+    def __init__(self, timeout: float):
+        self.timeout = timeout
+        self._calls: Dict[Hashable, asyncio.Task] = {}
+        self._waiters: Dict[asyncio.Task, int] = {}
+        self._metrics: Dict[str, Dict[str, int]] = defaultdict(
+            lambda: {"requests": 0, "executions": 0, "coalesced": 0, "errors": 0, "timeouts": 0}
+        )
+
+    def _forget(self, key: Hashable, task: asyncio.Task):
+        if self._calls.get(key) is task:
+            del self._calls[key]
+
+    async def do(
+        self,
+        kind: str,
+        key: Hashable,
+        fn: Callable[[], Awaitable[Any]],
+        timeout: Optional[float] = None,
+        copy: Optional[Callable[[Any], Any]] = None,
+    ) -> Any:
+        """Run ``fn`` unless an identical call is already in flight, in which
+        case wait for that one. Every caller, the leader included, receives
+        ``copy(result)`` when given, so nobody shares mutable documents. Errors
+        reach every waiter; a call left with no waiters is cancelled."""
+        metrics = self._metrics[kind]
+        metrics["requests"] += 1
+        key = (kind, key)
+
+        task = self._calls.get(key)
+        if task is None:
+            metrics["executions"] += 1
+            task = asyncio.ensure_future(fn())
+            self._calls[key] = task
+            self._waiters[task] = 0
+
+            def done(finished: asyncio.Task):
+                self._forget(key, finished)
+                self._waiters.pop(finished, None)
+                if not finished.cancelled() and finished.exception() is not None:
+                    metrics["errors"] += 1
+
+            task.add_done_callback(done)
+        else:
+            metrics["coalesced"] += 1
+
+        self._waiters[task] += 1
+        try:
+            result = await asyncio.wait_for(asyncio.shield(task), self.timeout if timeout is None else timeout)
+        except asyncio.TimeoutError:
+            # Let the next caller start a fresh query instead of queueing
+            # behind one that is stuck.
+            metrics["timeouts"] += 1
+            self._forget(key, task)
+            raise
+        finally:
+            if task in self._waiters:
+                self._waiters[task] -= 1
+                if self._waiters[task] == 0 and not task.done():
+                    self._forget(key, task)
+                    task.cancel()
+
+        return result if copy is None else copy(result)
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        snapshot = {}
+        for kind, counts in self._metrics.items():
+            snapshot[kind] = {
+                **counts,
+                "coalescingRatio": counts["coalesced"] / counts["requests"] if counts["requests"] else 0.0,
+            }
+        return snapshot
+
+
+reads = SingleFlight(settings.SINGLEFLIGHT_TIMEOUT_SECONDS)
+
+
+def _copy_documents(result):
+    if result is None:
+        return None
+    if isinstance(result, list):
+        return [document.model_copy(deep=True) for document in result]
+    return result.model_copy(deep=True)
+
+
+async def get_document(model: Type[Document], document_id, timeout: Optional[float] = None):
+    return await reads.do(
+        f"{model.__name__}.get",
+        str(document_id),
+        lambda: model.get(document_id),
+        timeout=timeout,
+        copy=_copy_documents,
+    )
+
+
+async def find_documents(model: Type[Document], query: dict, sort: Optional[str] = None, timeout: Optional[float] = None):
+    def run():
+        cursor = model.find(query)
+        if sort:
+            cursor = cursor.sort(sort)
+        return cursor.to_list()
+
+    return await reads.do(
+        f"{model.__name__}.find",
+        (json_util.dumps(query, sort_keys=True), sort),
+        run,
+        timeout=timeout,
+        copy=_copy_documents,
+    )
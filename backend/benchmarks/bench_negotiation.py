@@ -0,0 +1,136 @@
+"""Bytes and latency saved by response negotiation on list payloads.
+
+Builds feed / herd / notification payloads shaped like the real API
+responses, pushes them through the same encoders the middleware uses and
+reports encoded size, encode time and estimated transfer time on typical
+mobile links.
+
+    cd backend && python -m benchmarks.bench_negotiation
+"""
+import json
+import os
+import random
+import string
+import time
+from datetime import datetime, timedelta
+
+os.environ.setdefault("MONGODB_URI", "mongodb://localhost:27017")
+os.environ.setdefault("JWT_SECRET", "benchmark")
+os.environ.setdefault("JWT_EXPIRES_IN", "60")
+os.environ.setdefault("FRONTEND_URL", "http://localhost:3000")
+
+from core.negotiation import ENCODERS, msgpack  # noqa: E402
+
+# Downlink throughput in bytes/ms and round-trip time in ms.
+LINKS = {
+    "3g": (1_600_000 / 8 / 1000, 300),
+    "4g": (9_000_000 / 8 / 1000, 100),
+}
+
+WORDS = (
+    "today walked dog rain coffee work meeting tired happy family dinner "
+    "friend call gym run slow sunny lunch late bus train sleep finished "
+    "project proud grateful buffalo moment laughed kids weekend read book"
+).split()
+
+
+def object_id() -> str:
+    return "".join(random.choices("0123456789abcdef", k=24))
+
+
+def sentence(n: int) -> str:
+    return " ".join(random.choices(WORDS, k=n)).capitalize() + "."
+
+
+def user() -> dict:
+    name = "".join(random.choices(string.ascii_lowercase, k=8))
+    return {
+        "_id": object_id(),
+        "displayName": name.title(),
+        "email": f"{name}@example.com",
+        "password": "$2b$12$" + "".join(random.choices(string.ascii_letters, k=53)),
+        "createdAt": datetime(2024, 1, 1).isoformat(),
+    }
+
+
+def reflection(created: datetime) -> dict:
+    return {
+        "_id": object_id(),
+        "userId": object_id(),
+        "highText": sentence(random.randint(8, 30)),
+        "lowText": sentence(random.randint(8, 30)),
+        "buffaloText": sentence(random.randint(8, 30)),
+        "sharedWithType": random.choice(["self", "friend", "herd"]),
+        "sharedWithIds": [object_id() for _ in range(random.randint(0, 3))],
+        "reactions": [object_id() for _ in range(random.randint(0, 6))],
+        "createdAt": created.isoformat(),
+    }
+
+
+def herd(size: int) -> dict:
+    members = [user() for _ in range(size)]
+    return {
+        "_id": object_id(),
+        "name": sentence(2),
+        "ownerId": members[0]["_id"],
+        "memberIds": [m["_id"] for m in members],
+        "members": members,
+    }
+
+
+def notification() -> dict:
+    return {
+        "_id": object_id(),
+        "senderId": object_id(),
+        "recipientId": object_id(),
+        "type": "reflection_shared",
+        "read": random.random() < 0.5,
+        "message": f"{user()['displayName']} shared a reflection with your herd: {sentence(2)}",
+    }
+
+
+def payloads():
+    now = datetime(2024, 6, 1)
+    return {
+        "reflections x50": [reflection(now - timedelta(hours=i * 12)) for i in range(50)],
+        "reflections x200": [reflection(now - timedelta(hours=i * 12)) for i in range(200)],
+        "herds x10 (8 members)": [herd(8) for _ in range(10)],
+        "herds x25 (20 members)": [herd(20) for _ in range(25)],
+        "notifications x100": [notification() for _ in range(100)],
+    }
+
+
+def timed(fn, data, repeat: int = 20):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        out = fn(data)
+    return out, (time.perf_counter() - started) * 1000 / repeat
+
+
+def main():
+    random.seed(7)
+    encoders = dict(ENCODERS)
+    for name, payload in payloads().items():
+        serializers = {"json": lambda data: json.dumps(data, separators=(",", ":")).encode()}
+        if msgpack is not None:
+            serializers["msgpack"] = lambda data: msgpack.packb(data, use_bin_type=True)
+        bodies = {fmt: timed(fn, payload) for fmt, fn in serializers.items()}
+        baseline = len(bodies["json"][0])
+
+        print(f"\n{name}: {baseline:,} bytes of JSON")
+        print(f"  {'format':<16}{'bytes':>10}{'saved':>8}{'encode ms':>11}" + "".join(f"{link + ' ms':>10}" for link in LINKS))
+        for fmt, (body, serialize_ms) in bodies.items():
+            variants = [(fmt, body, serialize_ms)]
+            for encoding, fn in encoders.items():
+                compressed, elapsed = timed(fn, body)
+                variants.append((f"{fmt}+{encoding}", compressed, serialize_ms + elapsed))
+            for label, encoded, elapsed in variants:
+                saved = 1 - len(encoded) / baseline
+                transfer = "".join(
+                    f"{rtt + len(encoded) / bandwidth + elapsed:>10.1f}" for bandwidth, rtt in LINKS.values()
+                )
+                print(f"  {label:<16}{len(encoded):>10,}{saved:>8.0%}{elapsed:>11.2f}{transfer}")
+
+
+if __name__ == "__main__":
+    main()
@@ -12,6 +12,16 @@ class Settings(BaseSettings):
     JWT_EXPIRES_IN: int
     FRONTEND_URL: str
 
+    # Response compression: bodies below the minimum size are sent as-is, and
+    # an encoder whose estimated cost exceeds the CPU budget is skipped.
+    COMPRESSION_MINIMUM_SIZE: int = 1024
+    COMPRESSION_CPU_BUDGET_MS: float = 20.0
+    GZIP_LEVEL: int = 6
+    BROTLI_QUALITY: int = 5
+
+    # Identical concurrent reads share one query; waiters give up after this.
+    SINGLEFLIGHT_TIMEOUT_SECONDS: float = 5.0
+
     class Config:
         # The env_file path is now handled by the explicit load_dotenv call
         pass
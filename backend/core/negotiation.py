@@ -0,0 +1,191 @@
+import gzip
+import json
+import time
+from typing import Dict, List, Optional, Tuple
+
+from core.config import settings
+
+try:
+    import brotli
+except ImportError:  # brotli is optional, gzip is always available
+    brotli = None
+
+try:
+    import msgpack
+except ImportError:  # without msgpack every response stays JSON
+    msgpack = None
+
+JSON_MEDIA_TYPE = "application/json"
+MSGPACK_MEDIA_TYPES = ("application/msgpack", "application/x-msgpack")
+
+
+def parse_header_qualities(value: str) -> Dict[str, float]:
+    """Parse an Accept / Accept-Encoding header into a {token: q} mapping."""
+    qualities = {}
+    for part in value.split(","):
+        token, _, params = part.strip().partition(";")
+        token = token.strip().lower()
+        if not token:
+            continue
+        q = 1.0
+        for param in params.split(";"):
+            name, _, raw = param.strip().partition("=")
+            if name.strip() == "q":
+                try:
+                    q = float(raw)
+                except ValueError:
+                    q = 0.0
+        qualities[token] = q
+    return qualities
+
+
+def wants_msgpack(accept: str) -> bool:
+    """True when the client ranks MessagePack strictly above JSON."""
+    if msgpack is None or not accept:
+        return False
+    qualities = parse_header_qualities(accept)
+    msgpack_q = max(qualities.get(t, 0.0) for t in MSGPACK_MEDIA_TYPES)
+    json_q = qualities.get(JSON_MEDIA_TYPE, qualities.get("application/*", qualities.get("*/*", 0.0)))
+    return msgpack_q > 0 and msgpack_q > json_q
+
+
+class CompressionBudget:
+    """Tracks how long each encoder takes per byte so that a payload whose
+    estimated compression time exceeds the budget falls back to a cheaper
+    encoder (or none) instead of stalling the event loop."""
+
+    def __init__(self, budget_ms: float, smoothing: float = 0.2):
+        self.budget_ms = budget_ms
+        self.smoothing = smoothing
+        self.ms_per_byte: Dict[str, float] = {}
+
+    def allows(self, encoding: str, size: int) -> bool:
+        rate = self.ms_per_byte.get(encoding)
+        if rate is None:
+            return True
+        return rate * size <= self.budget_ms
+
+    def record(self, encoding: str, size: int, elapsed_ms: float):
+        rate = elapsed_ms / max(size, 1)
+        previous = self.ms_per_byte.get(encoding)
+        if previous is None:
+            self.ms_per_byte[encoding] = rate
+        else:
+            self.ms_per_byte[encoding] = previous + self.smoothing * (rate - previous)
+
+
+def _compress_brotli(body: bytes) -> bytes:
+    return brotli.compress(body, quality=settings.BROTLI_QUALITY)
+
+
+def _compress_gzip(body: bytes) -> bytes:
+    return gzip.compress(body, compresslevel=settings.GZIP_LEVEL, mtime=0)
+
+
+# Ordered from best ratio to cheapest; the first one the client accepts and
+# the budget allows wins.
+ENCODERS: List[Tuple[str, object]] = [("gzip", _compress_gzip)]
+if brotli is not None:
+    ENCODERS.insert(0, ("br", _compress_brotli))
+
+
+def choose_encodings(accept_encoding: str) -> List[str]:
+    """Return the encodings the client accepts, in server preference order."""
+    if not accept_encoding:
+        return []
+    qualities = parse_header_qualities(accept_encoding)
+    wildcard = qualities.get("*", 0.0)
+    return [name for name, _ in ENCODERS if qualities.get(name, wildcard) > 0]
+
+
+def compress(body: bytes, accept_encoding: str, budget: CompressionBudget) -> Tuple[Optional[str], bytes]:
+    """Compress ``body`` with the best acceptable encoder that fits the budget."""
+    if len(body) < settings.COMPRESSION_MINIMUM_SIZE:
+        return None, body
+    encoders = dict(ENCODERS)
+    for encoding in choose_encodings(accept_encoding):
+        if not budget.allows(encoding, len(body)):
+            continue
+        started = time.perf_counter()
+        compressed = encoders[encoding](body)
+        budget.record(encoding, len(body), (time.perf_counter() - started) * 1000)
+        if len(compressed) < len(body):
+            return encoding, compressed
+        return None, body
+    return None, body
+
+
+class ContentNegotiationMiddleware:
+    """ASGI middleware that re-encodes JSON responses as MessagePack when the
+    ``Accept`` header asks for it, then compresses the body according to
+    ``Accept-Encoding``. Streaming and already-encoded responses pass through."""
+
+    def __init__(self, app, budget_ms: Optional[float] = None):
+        self.app = app
+        self.budget = CompressionBudget(
+            settings.COMPRESSION_CPU_BUDGET_MS if budget_ms is None else budget_ms
+        )
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_headers = {k.decode("latin-1").lower(): v.decode("latin-1") for k, v in scope["headers"]}
+        accept = request_headers.get("accept", "")
+        accept_encoding = request_headers.get("accept-encoding", "")
+        to_msgpack = wants_msgpack(accept)
+
+        start_message = None
+        passthrough = False
+
+        async def negotiated_send(message):
+            nonlocal start_message, passthrough
+            if passthrough:
+                await send(message)
+                return
+
+            if message["type"] == "http.response.start":
+                start_message = message
+                return
+
+            if message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            headers = [(k.lower(), v) for k, v in start_message.get("headers", [])]
+            header_names = {k for k, _ in headers}
+            body = message.get("body", b"")
+            if not body or message.get("more_body", False) or b"content-encoding" in header_names:
+                passthrough = True
+                await send(start_message)
+                await send(message)
+                return
+
+            content_type = dict(headers).get(b"content-type", b"").decode("latin-1")
+            vary = [v for k, v in headers if k == b"vary"] + [b"Accept-Encoding"]
+
+            if content_type.startswith(JSON_MEDIA_TYPE):
+                vary.append(b"Accept")
+                if to_msgpack:
+                    body = msgpack.packb(json.loads(body), use_bin_type=True)
+                    content_type = MSGPACK_MEDIA_TYPES[1]
+
+            encoding, body = compress(body, accept_encoding, self.budget)
+
+            headers = [
+                (k, v) for k, v in headers
+                if k not in (b"content-length", b"content-type", b"vary")
+            ]
+            if content_type:
+                headers.append((b"content-type", content_type.encode("latin-1")))
+            if encoding:
+                headers.append((b"content-encoding", encoding.encode("latin-1")))
+            headers.append((b"content-length", str(len(body)).encode("latin-1")))
+            headers.append((b"vary", b", ".join(vary)))
+
+            start_message["headers"] = headers
+            await send(start_message)
+            await send({"type": "http.response.body", "body": body})
+
+        await self.app(scope, receive, negotiated_send)
@@ -5,6 +5,7 @@ from core.config import settings
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer
 from models.user import User
+from app.singleflight import get_document
 
 reusable_oauth2 = HTTPBearer()
 
@@ -25,7 +26,7 @@ async def get_current_user(token: str = Depends(reusable_oauth2)):
             headers={"WWW-Authenticate": "Bearer"},
         )
     
-    user = await User.get(user_id)
+    user = await get_document(User, user_id)
     if user is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
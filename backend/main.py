@@ -1,7 +1,11 @@
-from fastapi import FastAPI, APIRouter
+from fastapi import FastAPI, APIRouter, Depends
 from fastapi.middleware.cors import CORSMiddleware
 from app.database import ping_server, init_db
+from app.audience import ensure_audiences
 from core.config import settings
+from core.security import get_current_user
+from core.negotiation import ContentNegotiationMiddleware
+from app.singleflight import reads
 from routes import auth as auth_router
 from routes import herds as herds_router
 from routes import reflections as reflections_router
@@ -9,16 +13,21 @@ from routes import users as users_router
 from routes import reactions as reactions_router
 from routes import friends as friends_router
 from routes import notifications as notifications_router
+from routes import stats as stats_router
 
 app = FastAPI()
 
 @app.on_event("startup")
 async def startup_event():
     await init_db()
+    await ensure_audiences()
 
 # CORS Middleware
 router = APIRouter(prefix="/api/v1")
 
+# MessagePack / gzip / brotli responses, negotiated from Accept and Accept-Encoding
+app.add_middleware(ContentNegotiationMiddleware)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=[
@@ -36,6 +45,10 @@ app.add_middleware(
 async def health_check():
     return await ping_server()
 
+@router.get("/metrics", dependencies=[Depends(get_current_user)])
+async def metrics():
+    return {"singleflight": reads.snapshot()}
+
 router.include_router(auth_router.router, prefix="/auth", tags=["auth"])
 router.include_router(herds_router.router, prefix="/herds", tags=["herds"])
 router.include_router(reflections_router.router, prefix="/reflections", tags=["reflections"])
@@ -43,6 +56,7 @@ router.include_router(users_router.router, prefix="/users", tags=["users"])
 router.include_router(reactions_router.router, prefix="/reactions", tags=["reactions"])
 router.include_router(friends_router.router, prefix="/friends", tags=["friends"])
 router.include_router(notifications_router.router, prefix="/notifications", tags=["notifications"])
+router.include_router(stats_router.router, prefix="/stats", tags=["stats"])
 
 app.include_router(router)
 
@@ -0,0 +1,35 @@
+from pydantic import Field
+from typing import Dict, Optional
+from beanie import Document
+from app.collections import PydanticObjectId
+from datetime import datetime
+
+# Rollup documents are keyed by the user / herd id they summarise, so a stats
+# read is a single primary-key lookup. They are written with atomic $inc
+# upserts from app.rollups, never through Document.save().
+
+class UserActivity(Document):
+    id: Optional[PydanticObjectId] = Field(None, alias='_id')  # the user's id
+    reflectionCount: int = 0
+    reactionsGiven: int = 0
+    reactionsReceived: int = 0
+    # Recent history only, see app.rollups.DAILY_WINDOW_DAYS / WEEKLY_WINDOW_WEEKS
+    dailyCounts: Dict[str, int] = {}  # 'YYYY-MM-DD' -> reflections that day (UTC)
+    weeklyCounts: Dict[str, int] = {}  # ISO week 'YYYY-Www' -> reflections that week
+    currentStreak: int = 0
+    longestStreak: int = 0
+    lastReflectionDay: Optional[str] = None
+
+    class Settings:
+        name = "user_activity"
+
+class HerdActivity(Document):
+    id: Optional[PydanticObjectId] = Field(None, alias='_id')  # the herd's id
+    reflectionCount: int = 0
+    reactionCount: int = 0
+    postsByMember: Dict[str, int] = {}
+    weeklyCounts: Dict[str, int] = {}
+    lastActivityAt: Optional[datetime] = None
+
+    class Settings:
+        name = "herd_activity"
@@ -1,6 +1,7 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 from typing import List, Optional
 from beanie import Document
+from pymongo import IndexModel, ASCENDING, DESCENDING
 from app.collections import PydanticObjectId
 from datetime import datetime
 
@@ -23,10 +24,32 @@ class Reflection(Document):
     sharedWithType: str  # 'self', 'friend', 'herd'
     sharedWithIds: Optional[List[str]] = []
     reactions: List[PydanticObjectId] = []
+    # Author, friend ids, herd ids and herd member ids; see app.audience
+    audience: List[PydanticObjectId] = []
     createdAt: datetime = Field(default_factory=datetime.utcnow)
 
     class Settings:
         name = "reflections"
+        indexes = [
+            IndexModel([("audience", ASCENDING), ("createdAt", DESCENDING)]),
+        ]
+
+class ReflectionOut(BaseModel):
+    # Response shape for reflections; leaves out the internal audience list
+    model_config = ConfigDict(populate_by_name=True)
+
+    id: Optional[PydanticObjectId] = Field(None, alias='_id')
+    userId: PydanticObjectId
+    highText: str
+    lowText: str
+    buffaloText: str
+    sharedWithType: str
+    sharedWithIds: Optional[List[str]] = []
+    reactions: List[PydanticObjectId] = []
+    createdAt: datetime
+
+class ReflectionDetail(ReflectionOut):
+    reactions: List[Reaction] = []
 
 class ReflectionCreate(BaseModel):
     highText: str
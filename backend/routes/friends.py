@@ -4,6 +4,7 @@ from core.security import get_current_user
 from models.user import User
 from models.friend import Friend
 from app.collections import PydanticObjectId
+from app.singleflight import find_documents
 from routes.notifications import create_notification
 from models.notification import NotificationCreate
 
@@ -59,6 +60,6 @@ async def remove_friend(friend_id: PydanticObjectId, current_user: User = Depend
 async def get_friends(current_user: User = Depends(get_current_user)):
     friends = await Friend.find_one(Friend.user_id == current_user.id)
     if friends:
-        friend_users = await User.find({"_id": {"$in": friends.friend_ids}}).to_list()
+        friend_users = await find_documents(User, {"_id": {"$in": friends.friend_ids}})
         return friend_users
     return []
\ No newline at end of file
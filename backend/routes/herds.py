@@ -1,11 +1,13 @@
 from fastapi import APIRouter, Depends, HTTPException
 from typing import List
 from beanie import PydanticObjectId
-from beanie.operators import In
 
 from core.security import get_current_user
 from models.user import User
 from models.herd import Herd, HerdCreate, HerdUpdate
+from models.activity import HerdActivity
+from app.audience import sync_herd_audience, drop_herd_audience
+from app.singleflight import get_document, find_documents
 
 router = APIRouter()
 
@@ -37,18 +39,18 @@ async def create_herd(herd_data: HerdCreate, current_user: User = Depends(get_cu
 
 @router.get("/", response_model=List[Herd])
 async def read_herds(current_user: User = Depends(get_current_user)):
-    herds = await Herd.find(In(Herd.member_ids, [current_user.id])).to_list()
+    herds = await find_documents(Herd, {"memberIds": current_user.id})
     
     # Manually fetch and attach member details to each herd
     for herd in herds:
-        member_details = await User.find(In(User.id, herd.member_ids)).to_list()
+        member_details = await find_documents(User, {"_id": {"$in": herd.member_ids}})
         herd.members = member_details  # Assuming 'members' can be a dynamic attribute
         
     return herds
 
 @router.get("/{herd_id}", response_model=Herd)
 async def get_herd(herd_id: PydanticObjectId, current_user: User = Depends(get_current_user)):
-    herd = await Herd.get(herd_id)
+    herd = await get_document(Herd, herd_id)
     if not herd:
         raise HTTPException(status_code=404, detail="Herd not found")
     
@@ -63,12 +65,13 @@ async def update_herd(herd_id: PydanticObjectId, herd_data: HerdUpdate, current_
     if not herd:
         raise HTTPException(status_code=404, detail="Herd not found")
     
-    if herd.ownerId != current_user.id:
+    if herd.owner_id != current_user.id:
         raise HTTPException(status_code=403, detail="User is not the owner of this herd")
     
     if herd_data.name:
         herd.name = herd_data.name
     
+    previous_member_ids = list(herd.member_ids)
     if herd_data.member_emails is not None:
         member_ids = []
         for email in herd_data.member_emails:
@@ -80,6 +83,7 @@ async def update_herd(herd_id: PydanticObjectId, herd_data: HerdUpdate, current_
         herd.member_ids = member_ids
 
     await herd.save()
+    await sync_herd_audience(herd.id, previous_member_ids, herd.member_ids)
     return herd
 
 @router.delete("/{herd_id}")
@@ -88,10 +92,12 @@ async def delete_herd(herd_id: PydanticObjectId, current_user: User = Depends(ge
     if not herd:
         raise HTTPException(status_code=404, detail="Herd not found")
 
-    if herd.ownerId != current_user.id:
+    if herd.owner_id != current_user.id:
         raise HTTPException(status_code=403, detail="User is not the owner of this herd")
 
     await herd.delete()
+    await drop_herd_audience(herd)
+    await HerdActivity.find_one(HerdActivity.id == herd_id).delete()
     return {"message": "Herd deleted successfully"}
 
 @router.post("/{herd_id}/leave")
@@ -108,4 +114,5 @@ async def leave_herd(herd_id: PydanticObjectId, current_user: User = Depends(get
 
     herd.member_ids.remove(current_user.id)
     await herd.save()
+    await sync_herd_audience(herd.id, herd.member_ids + [current_user.id], herd.member_ids)
     return {"message": "Successfully left the herd"}
\ No newline at end of file
@@ -5,6 +5,7 @@ from beanie import PydanticObjectId
 from core.security import get_current_user
 from models.user import User
 from models.notification import Notification, NotificationCreate
+from app.singleflight import find_documents
 
 router = APIRouter()
 
@@ -19,7 +20,7 @@ async def create_notification(notification_data: NotificationCreate, current_use
 
 @router.get("/", response_model=List[Notification])
 async def read_notifications(current_user: User = Depends(get_current_user)):
-    notifications = await Notification.find({"recipientId": current_user.id}).to_list()
+    notifications = await find_documents(Notification, {"recipientId": current_user.id})
     return notifications
 
 @router.put("/{notification_id}/read")
@@ -1,38 +1,41 @@
 from fastapi import APIRouter, Depends, HTTPException
 from typing import List
 from beanie import PydanticObjectId
-from beanie.operators import In
 
 from core.security import get_current_user
 from models.user import User
-from models.reflection import Reflection, ReflectionCreate, Reaction, ReactionCreate
-from models.herd import Herd
+from models.reflection import Reflection, ReflectionCreate, ReflectionOut, ReflectionDetail, Reaction, ReactionCreate
 from models.notification import Notification
+from app.rollups import record_reflection, record_reaction
+from app.audience import build_audience, load_herds, shared_herd_ids, refresh_reflection_audience
+from app.singleflight import find_documents
 
 router = APIRouter()
 
-@router.post("/", response_model=Reflection)
+@router.post("/", response_model=ReflectionOut)
 async def create_reflection(reflection_data: ReflectionCreate, current_user: User = Depends(get_current_user)):
+    herds = await load_herds(shared_herd_ids(reflection_data.sharedWithType, reflection_data.sharedWithIds))
     new_reflection = Reflection(
         userId=current_user.id,
+        audience=build_audience(current_user.id, reflection_data.sharedWithType, reflection_data.sharedWithIds, herds),
         **reflection_data.model_dump()
     )
     await new_reflection.insert()
-
+    if herds:
+        await refresh_reflection_audience(new_reflection)
+    await record_reflection(new_reflection, herds)
 
     if new_reflection.sharedWithType == "herd" and new_reflection.sharedWithIds:
-        for herd_id in new_reflection.sharedWithIds:
-            herd = await Herd.get(PydanticObjectId(herd_id))
-            if herd:
-                for member_id in herd.member_ids:
-                    if member_id != current_user.id:
-                        notification = Notification(
-                            recipient_id=member_id,
-                            sender_id=current_user.id,
-                            type="reflection_shared",
-                            message=f"{current_user.displayName} shared a reflection with your herd: {herd.name}"
-                        )
-                        await notification.insert()
+        for herd in herds.values():
+            for member_id in herd.member_ids:
+                if member_id != current_user.id:
+                    notification = Notification(
+                        recipient_id=member_id,
+                        sender_id=current_user.id,
+                        type="reflection_shared",
+                        message=f"{current_user.displayName} shared a reflection with your herd: {herd.name}"
+                    )
+                    await notification.insert()
     elif new_reflection.sharedWithType == "friend" and new_reflection.sharedWithIds:
         for friend_id in new_reflection.sharedWithIds:
             notification = Notification(
@@ -45,67 +48,31 @@ async def create_reflection(reflection_data: ReflectionCreate, current_user: Use
 
     return new_reflection
 
-@router.get("/", response_model=List[Reflection])
+@router.get("/", response_model=List[ReflectionOut])
 async def get_reflections(current_user: User = Depends(get_current_user)):
-    # Find reflections created by the user
-    user_reflections = await Reflection.find(Reflection.userId == current_user.id).to_list()
-    
-    # Find herds the user is a member of
-    herds = await Herd.find(In(Herd.member_ids, [current_user.id])).to_list()
-    herd_ids = [str(herd.id) for herd in herds]
-    
-    # Find reflections shared with those herds
-    herd_reflections = await Reflection.find(
-        Reflection.sharedWithType == "herd",
-        In(Reflection.sharedWithIds, herd_ids)
-    ).to_list()
-
-    # Find reflections shared with the user as a friend
-    friend_reflections = await Reflection.find(
-        Reflection.sharedWithType == "friend",
-        In(Reflection.sharedWithIds, [str(current_user.id)])
-    ).to_list()
-    
-    # Combine and deduplicate
-    all_reflections = {r.id: r for r in user_reflections + herd_reflections + friend_reflections}
-    
-    # Sort reflections by creation date
-    sorted_reflections = sorted(all_reflections.values(), key=lambda r: r.createdAt, reverse=True)
-    
-    return sorted_reflections
+    # The user's own reflections and everything shared with them, via the
+    # (audience, createdAt) index
+    return await find_documents(Reflection, {"audience": current_user.id}, sort="-createdAt")
 
-@router.get("/{reflection_id}", response_model=Reflection)
+@router.get("/{reflection_id}", response_model=ReflectionDetail)
 async def get_reflection(reflection_id: PydanticObjectId, current_user: User = Depends(get_current_user)):
-    reflection = await Reflection.get(reflection_id)
+    # Reflections outside the user's audience are reported as missing rather
+    # than forbidden, so the check stays a single indexed lookup
+    reflection = await Reflection.find_one({"_id": reflection_id, "audience": current_user.id})
     if not reflection:
         raise HTTPException(status_code=404, detail="Reflection not found")
-    
-    # Basic authorization: check if user is the creator or part of the shared herd/friend group
-    # This is a simplified check. A more robust system would be needed for 'friend' sharing.
-    is_owner = reflection.userId == current_user.id
-    is_in_shared_herd = False
-    if reflection.sharedWithType == 'herd':
-        herd = await Herd.get(PydanticObjectId(reflection.sharedWithId))
-        if herd and current_user.id in herd.memberIds:
-            is_in_shared_herd = True
-            
-    if not is_owner and not is_in_shared_herd:
-        raise HTTPException(status_code=403, detail="Not authorized to view this reflection")
 
-    populated_reflection = reflection.model_dump()
-    populated_reflection["id"] = str(reflection.id)
     populated_reactions = []
     for reaction_id in reflection.reactions:
         reaction = await Reaction.get(reaction_id)
         if reaction:
-            populated_reactions.append(reaction.model_dump())
-    populated_reflection["reactions"] = populated_reactions
-    
-    return populated_reflection
+            populated_reactions.append(reaction)
+
+    return ReflectionDetail(**reflection.model_dump(exclude={"reactions", "audience"}), reactions=populated_reactions)
 
 @router.post("/{reflection_id}/react", response_model=Reaction)
 async def create_reaction(reflection_id: PydanticObjectId, reaction_data: ReactionCreate, current_user: User = Depends(get_current_user)):
-    reflection = await Reflection.get(reflection_id)
+    reflection = await Reflection.find_one({"_id": reflection_id, "audience": current_user.id})
     if not reflection:
         raise HTTPException(status_code=404, detail="Reflection not found")
 
@@ -124,7 +91,8 @@ async def create_reaction(reflection_id: PydanticObjectId, reaction_data: Reacti
     )
     await new_reaction.insert()
 
-    reflection.reactions.append(new_reaction.id)
-    await reflection.save()
+    # $push rather than save() so a concurrent audience update is not overwritten
+    await reflection.update({"$push": {"reactions": new_reaction.id}})
+    await record_reaction(reflection, new_reaction)
     
     return new_reaction
\ No newline at end of file
@@ -0,0 +1,36 @@
+from fastapi import APIRouter, Depends, HTTPException
+from datetime import datetime, timedelta
+from beanie import PydanticObjectId
+
+from core.security import get_current_user
+from models.user import User
+from models.herd import Herd
+from models.activity import UserActivity, HerdActivity
+from app.rollups import day_key
+
+router = APIRouter()
+
+@router.get("/me", response_model=UserActivity)
+async def get_my_stats(current_user: User = Depends(get_current_user)):
+    activity = await UserActivity.get(current_user.id)
+    if not activity:
+        return UserActivity(_id=current_user.id)
+
+    # The stored streak is only extended on write; once a full day has been
+    # missed it no longer counts as current.
+    yesterday = day_key(datetime.utcnow() - timedelta(days=1))
+    if activity.lastReflectionDay and activity.lastReflectionDay < yesterday:
+        activity.currentStreak = 0
+    return activity
+
+@router.get("/herds/{herd_id}", response_model=HerdActivity)
+async def get_herd_stats(herd_id: PydanticObjectId, current_user: User = Depends(get_current_user)):
+    herd = await Herd.get(herd_id)
+    if not herd:
+        raise HTTPException(status_code=404, detail="Herd not found")
+
+    if current_user.id not in herd.member_ids:
+        raise HTTPException(status_code=403, detail="User is not a member of this herd")
+
+    activity = await HerdActivity.get(herd_id)
+    return activity or HerdActivity(_id=herd_id)
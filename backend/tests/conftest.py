@@ -0,0 +1,77 @@
+import os
+
+import pymongo
+import pytest
+
+# core.config requires these; tests never talk to a real server.
+os.environ.setdefault("MONGODB_URI", "mongodb://localhost:27017")
+os.environ.setdefault("JWT_SECRET", "test-secret")
+os.environ.setdefault("JWT_EXPIRES_IN", "60")
+os.environ.setdefault("FRONTEND_URL", "http://localhost:3000")
+
+
+def pytest_collection_modifyitems(config, items):
+    # mongomock's bulk_write rejects the sort option pymongo 4.11 passes to
+    # bulk operations; skip rather than cap the driver for everyone.
+    if pymongo.version_tuple < (4, 11):
+        return
+    skip = pytest.mark.skip(reason="mongomock bulk_write is incompatible with pymongo>=4.11")
+    for item in items:
+        if "mongomock_bulk" in item.keywords:
+            item.add_marker(skip)
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture
+async def db(monkeypatch):
+    """Fresh in-memory database wired into app.database and Beanie."""
+    from beanie import init_beanie
+    from mongomock_motor import AsyncMongoMockClient
+
+    from app import database
+
+    mock_db = AsyncMongoMockClient().get_database("bright-wolf-hop-test")
+    monkeypatch.setattr(database, "db", mock_db)
+    await init_beanie(
+        database=mock_db,
+        document_models=[
+            database.User,
+            database.Herd,
+            database.Reflection,
+            database.Friend,
+            database.Reaction,
+            database.Notification,
+            database.UserActivity,
+            database.HerdActivity,
+        ],
+    )
+    return mock_db
+
+
+@pytest.fixture
+async def client(db):
+    import httpx
+
+    from main import app
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test/api/v1") as client:
+        yield client
+
+
+@pytest.fixture
+def make_user(db):
+    """Insert a user; returns (user, auth headers)."""
+    from core.security import create_access_token
+    from models.user import User
+
+    async def make(name: str):
+        user = User(displayName=name, email=f"{name}@example.com", password="hashed")
+        await user.insert()
+        return user, {"Authorization": f"Bearer {create_access_token({'sub': str(user.id)})}"}
+
+    return make
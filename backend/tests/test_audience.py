@@ -0,0 +1,123 @@
+from types import SimpleNamespace
+
+import pytest
+from bson import ObjectId
+
+from app.audience import (
+    backfill_audiences,
+    build_audience,
+    drop_herd_audience,
+    ensure_audiences,
+    refresh_reflection_audience,
+    sync_herd_audience,
+)
+from models.herd import Herd
+from models.reflection import Reflection
+
+
+def herd_with(*member_ids) -> Herd:
+    return Herd(id=ObjectId(), name="herd", ownerId=member_ids[0], member_ids=list(member_ids))
+
+
+def test_build_audience_self_and_friend():
+    author, friend = ObjectId(), ObjectId()
+    assert build_audience(author, "self", [], {}) == [author]
+    assert build_audience(author, "friend", [str(friend), "not-an-id"], {}) == [author, friend]
+
+
+def test_build_audience_herd():
+    author, member = ObjectId(), ObjectId()
+    herd = SimpleNamespace(id=ObjectId(), member_ids=[author, member])
+    missing = ObjectId()
+    audience = build_audience(author, "herd", [str(herd.id), str(missing)], {herd.id: herd})
+    assert audience == [author, herd.id, member]
+
+
+async def share(author, *herds) -> Reflection:
+    loaded = {herd.id: herd for herd in herds}
+    ids = [str(herd.id) for herd in herds]
+    reflection = Reflection(
+        userId=author, highText="h", lowText="l", buffaloText="b",
+        sharedWithType="herd", sharedWithIds=ids,
+        audience=build_audience(author, "herd", ids, loaded),
+    )
+    await reflection.insert()
+    return reflection
+
+
+async def audience_of(reflection: Reflection):
+    return set((await Reflection.get(reflection.id)).audience)
+
+
+@pytest.mark.anyio
+@pytest.mark.mongomock_bulk
+async def test_sync_adds_and_revokes_members(db):
+    author, stays, leaves, joins = ObjectId(), ObjectId(), ObjectId(), ObjectId()
+    herd = herd_with(author, stays, leaves)
+    await herd.insert()
+    reflection = await share(author, herd)
+
+    herd.member_ids = [author, stays, joins]
+    await herd.save()
+    await sync_herd_audience(herd.id, [author, stays, leaves], herd.member_ids)
+
+    assert await audience_of(reflection) == {author, herd.id, stays, joins}
+
+
+@pytest.mark.anyio
+async def test_revoke_keeps_access_through_another_herd(db):
+    author, shared_member = ObjectId(), ObjectId()
+    first, second = herd_with(author, shared_member), herd_with(author, shared_member)
+    await first.insert()
+    await second.insert()
+    reflection = await share(author, first, second)
+
+    first.member_ids = [author]
+    await first.save()
+    await sync_herd_audience(first.id, [author, shared_member], first.member_ids)
+
+    assert shared_member in await audience_of(reflection)
+
+
+@pytest.mark.anyio
+@pytest.mark.mongomock_bulk
+async def test_drop_herd_audience_keeps_author(db):
+    author, member = ObjectId(), ObjectId()
+    herd = herd_with(author, member)
+    await herd.insert()
+    reflection = await share(author, herd)
+
+    await herd.delete()
+    await drop_herd_audience(herd)
+
+    assert await audience_of(reflection) == {author}
+
+
+@pytest.mark.anyio
+async def test_refresh_picks_up_membership_changed_before_insert(db):
+    author, left, joined = ObjectId(), ObjectId(), ObjectId()
+    herd = herd_with(author, left)
+    await herd.insert()
+    reflection = await share(author, herd)  # audience resolved from the old membership
+
+    herd.member_ids = [author, joined]
+    await herd.save()
+    await refresh_reflection_audience(reflection)
+
+    assert await audience_of(reflection) == {author, herd.id, joined}
+
+
+@pytest.mark.anyio
+@pytest.mark.mongomock_bulk
+async def test_backfill_and_startup_migration(db):
+    author, friend = ObjectId(), ObjectId()
+    legacy = db["reflections"]
+    await legacy.insert_one({
+        "userId": author, "highText": "h", "lowText": "l", "buffaloText": "b",
+        "sharedWithType": "friend", "sharedWithIds": [str(friend)], "reactions": [],
+    })
+
+    assert await ensure_audiences() == {"reflections": 1}
+    assert set((await legacy.find_one())["audience"]) == {author, friend}
+    assert await ensure_audiences() == {"reflections": 0}
+    assert await backfill_audiences() == {"reflections": 1}
@@ -0,0 +1,97 @@
+import json
+
+import httpx
+import msgpack
+import pytest
+from fastapi import FastAPI
+
+from core.negotiation import (
+    CompressionBudget,
+    ContentNegotiationMiddleware,
+    compress,
+    parse_header_qualities,
+    wants_msgpack,
+)
+
+LARGE_BODY = json.dumps([{"highText": "walked the dog in the rain", "i": i} for i in range(200)]).encode()
+
+
+def test_parse_header_qualities():
+    assert parse_header_qualities("gzip, br;q=0.8, *;q=0") == {"gzip": 1.0, "br": 0.8, "*": 0.0}
+    assert parse_header_qualities("Application/JSON;q=bad") == {"application/json": 0.0}
+    assert parse_header_qualities("") == {}
+
+
+@pytest.mark.parametrize("accept, expected", [
+    ("application/x-msgpack", True),
+    ("application/msgpack, application/json;q=0.9", True),
+    ("application/json, application/x-msgpack;q=0.5", False),
+    ("application/x-msgpack;q=0.5, */*;q=0.8", False),
+    ("application/x-msgpack;q=0", False),
+    ("*/*", False),
+    ("", False),
+])
+def test_wants_msgpack(accept, expected):
+    assert wants_msgpack(accept) is expected
+
+
+def test_compress_skips_small_bodies():
+    assert compress(b'{"x":1}', "br, gzip", CompressionBudget(100)) == (None, b'{"x":1}')
+
+
+def test_compress_prefers_brotli_then_gzip():
+    encoding, body = compress(LARGE_BODY, "gzip, br", CompressionBudget(100))
+    assert encoding == "br" and len(body) < len(LARGE_BODY)
+
+    encoding, _ = compress(LARGE_BODY, "gzip", CompressionBudget(100))
+    assert encoding == "gzip"
+
+
+def test_compress_without_acceptable_encoding():
+    assert compress(LARGE_BODY, "", CompressionBudget(100)) == (None, LARGE_BODY)
+    assert compress(LARGE_BODY, "identity, br;q=0, gzip;q=0", CompressionBudget(100)) == (None, LARGE_BODY)
+
+
+def test_compress_falls_back_when_over_budget():
+    budget = CompressionBudget(1.0)
+    budget.record("br", 1, 10.0)  # 10 ms per byte: brotli never fits
+    encoding, _ = compress(LARGE_BODY, "br, gzip", budget)
+    assert encoding == "gzip"
+
+    budget.record("gzip", 1, 10.0)
+    assert compress(LARGE_BODY, "br, gzip", budget) == (None, LARGE_BODY)
+
+
+@pytest.fixture
+def client():
+    app = FastAPI()
+    app.add_middleware(ContentNegotiationMiddleware)
+
+    @app.get("/reflections")
+    def reflections():
+        return json.loads(LARGE_BODY)
+
+    transport = httpx.ASGITransport(app=app)
+    return httpx.AsyncClient(transport=transport, base_url="http://test")
+
+
+@pytest.mark.anyio
+async def test_middleware_msgpack_and_gzip(client):
+    async with client:
+        response = await client.get("/reflections", headers={
+            "Accept": "application/x-msgpack", "Accept-Encoding": "gzip",
+        })
+    assert response.headers["content-type"] == "application/x-msgpack"
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["vary"] == "Accept-Encoding, Accept"
+    assert msgpack.unpackb(response.content) == json.loads(LARGE_BODY)
+
+
+@pytest.mark.anyio
+async def test_middleware_plain_json(client):
+    async with client:
+        response = await client.get("/reflections", headers={"Accept-Encoding": "identity"})
+    assert response.headers["content-type"] == "application/json"
+    assert "content-encoding" not in response.headers
+    assert int(response.headers["content-length"]) == len(response.content)
+    assert response.json() == json.loads(LARGE_BODY)
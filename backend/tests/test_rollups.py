@@ -0,0 +1,151 @@
+from datetime import datetime, timedelta
+
+import pytest
+from bson import ObjectId
+
+from app.audience import build_audience
+from app.rollups import (
+    DAILY_WINDOW_DAYS,
+    backfill_rollups,
+    compute_streaks,
+    day_key,
+    record_reaction,
+    record_reflection,
+    streak_pipeline,
+)
+from models.activity import HerdActivity, UserActivity
+from models.herd import Herd
+from models.reflection import Reaction, Reflection
+
+
+def test_compute_streaks():
+    assert compute_streaks([]) == {"currentStreak": 0, "longestStreak": 0, "lastReflectionDay": None}
+    days = ["2024-01-04", "2024-01-01", "2024-01-02", "2024-01-03", "2024-01-10", "2024-01-11"]
+    assert compute_streaks(days) == {"currentStreak": 2, "longestStreak": 4, "lastReflectionDay": "2024-01-11"}
+
+
+def test_compute_streaks_across_month_boundary():
+    assert compute_streaks(["2024-02-28", "2024-02-29", "2024-03-01"])["currentStreak"] == 3
+
+
+@pytest.mark.anyio
+async def test_streak_pipeline(db):
+    users = db["user_activity"]
+    await users.insert_one({"_id": 1})
+
+    async def post(day: str):
+        previous = day_key(datetime.strptime(day, "%Y-%m-%d") - timedelta(days=1))
+        await users.update_one({"_id": 1}, streak_pipeline(day, previous))
+        doc = await users.find_one({"_id": 1})
+        return doc["currentStreak"], doc["longestStreak"], doc["lastReflectionDay"]
+
+    assert await post("2024-01-01") == (1, 1, "2024-01-01")
+    assert await post("2024-01-01") == (1, 1, "2024-01-01")
+    assert await post("2024-01-02") == (2, 2, "2024-01-02")
+    assert await post("2024-01-03") == (3, 3, "2024-01-03")
+    assert await post("2024-01-06") == (1, 3, "2024-01-06")
+    assert await post("2024-01-07") == (2, 3, "2024-01-07")
+
+
+async def make_herd(*member_ids) -> Herd:
+    herd = Herd(name="herd", ownerId=member_ids[0], memberIds=list(member_ids))
+    await herd.insert()
+    return herd
+
+
+def reflection(user_id, created: datetime, *herds, herd_ids=()) -> Reflection:
+    ids = [str(herd.id) for herd in herds] + [str(herd_id) for herd_id in herd_ids]
+    shared_with_type = "herd" if ids else "self"
+    return Reflection(
+        id=ObjectId(),
+        userId=user_id,
+        highText="high",
+        lowText="low",
+        buffaloText="buffalo",
+        sharedWithType=shared_with_type,
+        sharedWithIds=ids,
+        audience=build_audience(user_id, shared_with_type, ids, {herd.id: herd for herd in herds}),
+        createdAt=created,
+    )
+
+
+@pytest.mark.anyio
+@pytest.mark.mongomock_bulk
+async def test_record_reflection_and_reaction(db):
+    author, reactor = ObjectId(), ObjectId()
+    herd = await make_herd(author, reactor)
+    herds = {herd.id: herd}
+    start = datetime(2024, 3, 1, 12)
+
+    for offset in range(3):
+        await record_reflection(reflection(author, start + timedelta(days=offset), herd), herds)
+    shared = reflection(author, start + timedelta(days=3), herd)
+    await record_reflection(shared, herds)
+    await record_reaction(shared, Reaction(reflectionId=shared.id, userId=reactor, createdAt=start + timedelta(days=4)))
+
+    activity = await UserActivity.get(author)
+    assert activity.reflectionCount == 4
+    assert activity.currentStreak == activity.longestStreak == 4
+    assert activity.lastReflectionDay == "2024-03-04"
+    assert activity.reactionsReceived == 1
+    assert (await UserActivity.get(reactor)).reactionsGiven == 1
+
+    activity = await HerdActivity.get(herd.id)
+    assert activity.reflectionCount == 4
+    assert activity.reactionCount == 1
+    assert activity.postsByMember == {str(author): 4}
+    assert activity.lastActivityAt == start + timedelta(days=4)
+
+
+@pytest.mark.anyio
+@pytest.mark.mongomock_bulk
+async def test_record_skips_missing_and_foreign_herds(db):
+    author, stranger = ObjectId(), ObjectId()
+    foreign = await make_herd(stranger)
+    shared = reflection(author, datetime(2024, 3, 1), foreign, herd_ids=[ObjectId()])
+
+    await record_reflection(shared, {foreign.id: foreign})
+    await record_reaction(shared, Reaction(reflectionId=shared.id, userId=stranger, createdAt=datetime(2024, 3, 2)))
+
+    assert await HerdActivity.find_all().to_list() == []
+    assert (await UserActivity.get(author)).reflectionCount == 1
+
+
+@pytest.mark.anyio
+async def test_record_reflection_keeps_a_bounded_daily_window(db):
+    author = ObjectId()
+    start = datetime(2024, 1, 1, 12)
+    for offset in range(DAILY_WINDOW_DAYS + 10):
+        await record_reflection(reflection(author, start + timedelta(days=offset)), {})
+
+    activity = await UserActivity.get(author)
+    assert len(activity.dailyCounts) == DAILY_WINDOW_DAYS
+    assert min(activity.dailyCounts) == day_key(start + timedelta(days=10))
+    assert activity.currentStreak == DAILY_WINDOW_DAYS + 10
+
+
+@pytest.mark.anyio
+@pytest.mark.mongomock_bulk
+async def test_backfill_matches_live_counters(db):
+    author, reactor = ObjectId(), ObjectId()
+    herd, foreign = await make_herd(author, reactor), await make_herd(reactor)
+    now = datetime.utcnow()
+    posts = [reflection(author, now - timedelta(days=offset), herd) for offset in (45, 2, 1, 0)]
+    stray = reflection(author, now - timedelta(days=3), foreign, herd_ids=[ObjectId()])
+    for post in posts + [stray]:
+        await post.insert()
+    await Reaction(reflectionId=posts[-1].id, userId=reactor, createdAt=now).insert()
+    await Reaction(reflectionId=stray.id, userId=reactor, createdAt=now).insert()
+
+    assert await backfill_rollups(batch_size=2) == {"users": 2, "herds": 1}
+
+    activity = await UserActivity.get(author)
+    assert activity.reflectionCount == 5
+    assert activity.currentStreak == 4 and activity.longestStreak == 4
+    assert day_key(now - timedelta(days=45)) not in activity.dailyCounts
+    assert activity.reactionsReceived == 2
+    assert (await UserActivity.get(reactor)).reactionsGiven == 2
+
+    assert [activity.id for activity in await HerdActivity.find_all().to_list()] == [herd.id]
+    activity = await HerdActivity.get(herd.id)
+    assert activity.reflectionCount == 4 and activity.reactionCount == 1
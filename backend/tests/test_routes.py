@@ -0,0 +1,101 @@
+import pytest
+
+from models.activity import HerdActivity, UserActivity
+from models.reflection import Reflection
+
+pytestmark = [pytest.mark.anyio, pytest.mark.mongomock_bulk]
+
+
+async def create_herd(client, headers, *members):
+    response = await client.post("/herds/", json={
+        "name": "buffalo", "memberEmails": [member.email for member in members],
+    }, headers=headers)
+    assert response.status_code == 200
+    return response.json()["_id"]
+
+
+async def share_with_herd(client, headers, herd_id):
+    response = await client.post("/reflections/", json={
+        "highText": "h", "lowText": "l", "buffaloText": "b",
+        "sharedWithType": "herd", "sharedWithIds": [herd_id],
+    }, headers=headers)
+    assert response.status_code == 200
+    assert "audience" not in response.json()
+    return response.json()["_id"]
+
+
+async def test_herd_update_propagates_to_audience(client, make_user):
+    owner, owner_headers = await make_user("owner")
+    member, member_headers = await make_user("member")
+    newcomer, newcomer_headers = await make_user("newcomer")
+
+    herd_id = await create_herd(client, owner_headers, member)
+    reflection_id = await share_with_herd(client, owner_headers, herd_id)
+    assert (await client.get(f"/reflections/{reflection_id}", headers=member_headers)).status_code == 200
+    assert (await client.get(f"/reflections/{reflection_id}", headers=newcomer_headers)).status_code == 404
+
+    response = await client.put(f"/herds/{herd_id}", json={
+        "memberEmails": [owner.email, newcomer.email],
+    }, headers=owner_headers)
+    assert response.status_code == 200
+
+    assert (await client.get(f"/reflections/{reflection_id}", headers=member_headers)).status_code == 404
+    assert (await client.get(f"/reflections/{reflection_id}", headers=newcomer_headers)).status_code == 200
+    feed = (await client.get("/reflections/", headers=newcomer_headers)).json()
+    assert [r["_id"] for r in feed] == [reflection_id]
+    assert "audience" not in feed[0]
+
+
+async def test_herd_delete_revokes_audience(client, make_user):
+    owner, owner_headers = await make_user("owner")
+    member, member_headers = await make_user("member")
+
+    herd_id = await create_herd(client, owner_headers, member)
+    reflection_id = await share_with_herd(client, owner_headers, herd_id)
+
+    assert (await client.delete(f"/herds/{herd_id}", headers=owner_headers)).status_code == 200
+
+    assert (await client.get(f"/reflections/{reflection_id}", headers=member_headers)).status_code == 404
+    assert (await client.get(f"/reflections/{reflection_id}", headers=owner_headers)).status_code == 200
+    assert set((await Reflection.get(reflection_id)).audience) == {owner.id}
+
+
+async def test_react_after_herd_delete_leaves_rollup_deleted(client, make_user):
+    owner, owner_headers = await make_user("owner")
+    member, _ = await make_user("member")
+
+    herd_id = await create_herd(client, owner_headers, member)
+    reflection_id = await share_with_herd(client, owner_headers, herd_id)
+    assert await HerdActivity.get(herd_id) is not None
+
+    assert (await client.delete(f"/herds/{herd_id}", headers=owner_headers)).status_code == 200
+    assert await HerdActivity.get(herd_id) is None
+
+    response = await client.post(f"/reflections/{reflection_id}/react", json={}, headers=owner_headers)
+    assert response.status_code == 200
+    assert await HerdActivity.get(herd_id) is None
+    assert (await UserActivity.get(owner.id)).reactionsGiven == 1
+
+
+async def test_react_requires_audience(client, make_user):
+    owner, owner_headers = await make_user("owner")
+    member, member_headers = await make_user("member")
+    outsider, outsider_headers = await make_user("outsider")
+
+    herd_id = await create_herd(client, owner_headers, member)
+    reflection_id = await share_with_herd(client, owner_headers, herd_id)
+
+    response = await client.post(f"/reflections/{reflection_id}/react", json={}, headers=outsider_headers)
+    assert response.status_code == 404
+    assert await UserActivity.get(outsider.id) is None
+    assert (await HerdActivity.get(herd_id)).reactionCount == 0
+
+    response = await client.post(f"/reflections/{reflection_id}/react", json={}, headers=member_headers)
+    assert response.status_code == 200
+    assert (await HerdActivity.get(herd_id)).reactionCount == 1
+
+    detail = (await client.get(f"/reflections/{reflection_id}", headers=owner_headers)).json()
+    assert [reaction["userId"] for reaction in detail["reactions"]] == [str(member.id)]
+    assert "audience" not in detail
+    # The reaction must not have clobbered the stored audience
+    assert member.id in (await Reflection.get(reflection_id)).audience
@@ -0,0 +1,124 @@
+import asyncio
+
+import pytest
+
+from app.singleflight import SingleFlight, find_documents, get_document, reads
+from models.user import User
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_concurrent_calls_share_one_execution():
+    flight = SingleFlight(timeout=1)
+    calls = 0
+
+    async def query():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return {"members": []}
+
+    results = await asyncio.gather(*[flight.do("Herd.get", "a", query, copy=dict) for _ in range(5)])
+
+    assert calls == 1
+    assert all(result == {"members": []} for result in results)
+    assert len({id(result) for result in results}) == 5
+    assert flight.snapshot()["Herd.get"] == {
+        "requests": 5, "executions": 1, "coalesced": 4, "errors": 0, "timeouts": 0, "coalescingRatio": 0.8,
+    }
+
+
+async def test_leader_mutation_is_not_seen_by_followers():
+    flight = SingleFlight(timeout=1)
+
+    async def query():
+        await asyncio.sleep(0.01)
+        return {"members": None}
+
+    async def leader():
+        result = await flight.do("Herd.find", "q", query, copy=dict)
+        result["members"] = ["hydrated"]
+        return result
+
+    async def follower():
+        await asyncio.sleep(0)
+        return await flight.do("Herd.find", "q", query, copy=dict)
+
+    _, followed = await asyncio.gather(leader(), follower())
+    assert followed == {"members": None}
+
+
+async def test_errors_reach_every_waiter():
+    flight = SingleFlight(timeout=1)
+
+    async def query():
+        await asyncio.sleep(0.01)
+        raise ValueError("boom")
+
+    results = await asyncio.gather(*[flight.do("User.get", "a", query) for _ in range(3)], return_exceptions=True)
+
+    assert [type(result) for result in results] == [ValueError] * 3
+    assert flight.snapshot()["User.get"]["errors"] == 1
+
+
+async def test_timeout_releases_key_and_cancels_abandoned_call():
+    flight = SingleFlight(timeout=0.02)
+    started = []
+
+    async def stuck():
+        task = asyncio.current_task()
+        started.append(task)
+        await asyncio.sleep(10)
+
+    results = await asyncio.gather(*[flight.do("User.find", "q", stuck) for _ in range(2)], return_exceptions=True)
+    assert [type(result) for result in results] == [asyncio.TimeoutError] * 2
+
+    await asyncio.sleep(0)
+    assert started[0].cancelled()
+    assert flight._calls == {} and flight._waiters == {}
+
+    async def fresh():
+        return "ok"
+
+    assert await flight.do("User.find", "q", fresh) == "ok"
+    assert flight.snapshot()["User.find"]["timeouts"] == 2
+
+
+async def test_call_kept_alive_while_a_waiter_remains():
+    flight = SingleFlight(timeout=1)
+
+    async def slow():
+        await asyncio.sleep(0.05)
+        return "done"
+
+    impatient = asyncio.ensure_future(flight.do("User.get", "a", slow, timeout=0.01))
+    patient = asyncio.ensure_future(flight.do("User.get", "a", slow))
+
+    with pytest.raises(asyncio.TimeoutError):
+        await impatient
+    assert await patient == "done"
+
+
+async def test_document_helpers_return_independent_copies(db):
+    user = User(displayName="Ada", email="ada@example.com", password="x")
+    await user.insert()
+
+    first, second = await asyncio.gather(get_document(User, user.id), get_document(User, user.id))
+    assert first == second and first is not second
+
+    found, again = await asyncio.gather(
+        find_documents(User, {"_id": {"$in": [user.id]}}),
+        find_documents(User, {"_id": {"$in": [user.id]}}),
+    )
+    assert [u.id for u in found] == [user.id]
+    assert found[0] is not again[0]
+    assert reads.snapshot()["User.find"]["coalesced"] >= 1
+
+
+async def test_metrics_requires_authentication(client, make_user):
+    assert (await client.get("/metrics")).status_code in (401, 403)
+
+    _, headers = await make_user("ops")
+    response = await client.get("/metrics", headers=headers)
+    assert response.status_code == 200
+    assert "singleflight" in response.json()
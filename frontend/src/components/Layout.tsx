@@ -3,6 +3,7 @@
 import { ReactNode, useEffect, useState } from "react";
 import { Link, useLocation, useNavigate } from "react-router-dom"; // Import useLocation and useNavigate
 import { useAuth } from "@/context/AuthContext";
+import { apiFetch, readBody } from "@/lib/api";
 import { Button } from "@/components/ui/button";
 import { Home, PlusCircle, History, Users, Settings, LogOut, Bell, Heart } from "lucide-react";
 import { MadeWithDyad } from "./made-with-dyad";
@@ -21,11 +22,9 @@ const Layout = ({ children }: LayoutProps) => {
     const fetchNotifications = async () => {
       if (isAuthenticated && user && token) {
         try {
-          const response = await fetch(`${import.meta.env.VITE_API_URL}/notifications`, {
-            headers: { Authorization: `Bearer ${token}` },
-          });
+          const response = await apiFetch("/notifications", token);
           if (response.ok) {
-            const notifications = await response.json();
+            const notifications = await readBody(response);
             const unreadCount = notifications.filter((n: any) => !n.read).length;
             setUnreadNotifications(unreadCount);
           }
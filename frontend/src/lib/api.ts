@@ -0,0 +1,30 @@
+import { decodeMsgpack } from "@/lib/msgpack";
+
+export const API_BASE_URL = `${import.meta.env.VITE_API_URL}`;
+
+const MSGPACK_MEDIA_TYPE = "application/x-msgpack";
+
+interface ApiFetchOptions extends RequestInit {
+  // Ask the API for MessagePack instead of JSON; compression (gzip/br) is
+  // negotiated by the browser on its own.
+  msgpack?: boolean;
+}
+
+export const apiFetch = (path: string, token: string | null, { msgpack = true, headers, ...init }: ApiFetchOptions = {}) =>
+  fetch(`${API_BASE_URL}${path}`, {
+    ...init,
+    headers: {
+      Accept: msgpack ? `${MSGPACK_MEDIA_TYPE}, application/json;q=0.9` : "application/json",
+      ...(token ? { Authorization: `Bearer ${token}` } : {}),
+      ...headers,
+    },
+  });
+
+// Decode a response body according to the Content-Type the API picked.
+export const readBody = async <T = any>(response: Response): Promise<T> => {
+  const contentType = response.headers.get("Content-Type") || "";
+  if (contentType.includes("msgpack")) {
+    return decodeMsgpack<T>(await response.arrayBuffer());
+  }
+  return response.json();
+};
@@ -0,0 +1,78 @@
+// Minimal MessagePack decoder covering the types the API emits
+// (nil, booleans, numbers, strings, binary, arrays and maps).
+
+const textDecoder = new TextDecoder();
+
+export function decodeMsgpack<T = unknown>(buffer: ArrayBuffer): T {
+  const view = new DataView(buffer);
+  const bytes = new Uint8Array(buffer);
+  let offset = 0;
+
+  const readString = (length: number) => {
+    const value = textDecoder.decode(bytes.subarray(offset, offset + length));
+    offset += length;
+    return value;
+  };
+
+  const readBinary = (length: number) => {
+    const value = bytes.slice(offset, offset + length);
+    offset += length;
+    return value;
+  };
+
+  const readArray = (length: number): unknown[] => {
+    const value = new Array(length);
+    for (let i = 0; i < length; i++) value[i] = read();
+    return value;
+  };
+
+  const readMap = (length: number): Record<string, unknown> => {
+    const value: Record<string, unknown> = {};
+    for (let i = 0; i < length; i++) {
+      const key = String(read());
+      value[key] = read();
+    }
+    return value;
+  };
+
+  const read = (): unknown => {
+    const type = bytes[offset++];
+
+    if (type <= 0x7f) return type;
+    if (type >= 0xe0) return type - 0x100;
+    if ((type & 0xf0) === 0x80) return readMap(type & 0x0f);
+    if ((type & 0xf0) === 0x90) return readArray(type & 0x0f);
+    if ((type & 0xe0) === 0xa0) return readString(type & 0x1f);
+
+    let value: unknown;
+    switch (type) {
+      case 0xc0: return null;
+      case 0xc2: return false;
+      case 0xc3: return true;
+      case 0xc4: { const n = view.getUint8(offset); offset += 1; return readBinary(n); }
+      case 0xc5: { const n = view.getUint16(offset); offset += 2; return readBinary(n); }
+      case 0xc6: { const n = view.getUint32(offset); offset += 4; return readBinary(n); }
+      case 0xca: value = view.getFloat32(offset); offset += 4; return value;
+      case 0xcb: value = view.getFloat64(offset); offset += 8; return value;
+      case 0xcc: value = view.getUint8(offset); offset += 1; return value;
+      case 0xcd: value = view.getUint16(offset); offset += 2; return value;
+      case 0xce: value = view.getUint32(offset); offset += 4; return value;
+      case 0xcf: value = Number(view.getBigUint64(offset)); offset += 8; return value;
+      case 0xd0: value = view.getInt8(offset); offset += 1; return value;
+      case 0xd1: value = view.getInt16(offset); offset += 2; return value;
+      case 0xd2: value = view.getInt32(offset); offset += 4; return value;
+      case 0xd3: value = Number(view.getBigInt64(offset)); offset += 8; return value;
+      case 0xd9: { const n = view.getUint8(offset); offset += 1; return readString(n); }
+      case 0xda: { const n = view.getUint16(offset); offset += 2; return readString(n); }
+      case 0xdb: { const n = view.getUint32(offset); offset += 4; return readString(n); }
+      case 0xdc: { const n = view.getUint16(offset); offset += 2; return readArray(n); }
+      case 0xdd: { const n = view.getUint32(offset); offset += 4; return readArray(n); }
+      case 0xde: { const n = view.getUint16(offset); offset += 2; return readMap(n); }
+      case 0xdf: { const n = view.getUint32(offset); offset += 4; return readMap(n); }
+      default:
+        throw new Error(`Unsupported MessagePack type 0x${type.toString(16)}`);
+    }
+  };
+
+  return read() as T;
+}
@@ -5,6 +5,7 @@ import { Link, useNavigate } from "react-router-dom";
 import { Button } from "@/components/ui/button";
 import { Card, CardContent, CardDescription, CardHeader, CardTitle } from "@/components/ui/card";
 import { useAuth } from "@/context/AuthContext";
+import { apiFetch, readBody } from "@/lib/api";
 import { PlusCircle } from "lucide-react";
 
 // Assuming User and Herd types are defined in a types file, e.g., @/types.ts
@@ -23,8 +24,6 @@ interface Herd {
   members?: User[];
 }
 
-const API_BASE_URL = `${import.meta.env.VITE_API_URL}`;
-
 const HerdsPage = () => {
   const navigate = useNavigate();
   const { user, token } = useAuth();
@@ -36,21 +35,17 @@ const HerdsPage = () => {
       if (user && token) {
         try {
           // Fetch all users to resolve member names
-          const usersResponse = await fetch(`${API_BASE_URL}/users`, {
-            headers: { Authorization: `Bearer ${token}` },
-          });
+          const usersResponse = await apiFetch("/users", token);
           if (usersResponse.ok) {
-            const usersData = await usersResponse.json();
+            const usersData = await readBody(usersResponse);
             console.log("Fetched all users:", usersData);
             setAllUsers(usersData);
           }
 
           // Fetch herds for the current user
-          const herdsResponse = await fetch(`${API_BASE_URL}/herds`, {
-            headers: { Authorization: `Bearer ${token}` },
-          });
+          const herdsResponse = await apiFetch("/herds", token);
           if (herdsResponse.ok) {
-            const herdsData = await herdsResponse.json();
+            const herdsData = await readBody(herdsResponse);
             console.log("Fetched herds:", herdsData);
             setHerds(herdsData);
           }
@@ -2,6 +2,7 @@
 
 import { useEffect, useState } from "react";
 import { useAuth } from "@/context/AuthContext";
+import { apiFetch, readBody } from "@/lib/api";
 import { Card, CardContent, CardDescription, CardHeader, CardTitle } from "@/components/ui/card";
 import { Badge } from "@/components/ui/badge";
 import { MessageCircleMore } from "lucide-react";
@@ -34,8 +35,6 @@ interface Reaction {
   reactionType: string;
 }
 
-const API_BASE_URL = `${import.meta.env.VITE_API_URL}`;
-
 const HistoryPage = () => {
   const { user, token } = useAuth();
   const [reflections, setReflections] = useState<Reflection[]>([]);
@@ -48,18 +47,18 @@ const HistoryPage = () => {
       if (user && token) {
         try {
           const [reflectionsRes, usersRes, herdsRes] = await Promise.all([
-            fetch(`${API_BASE_URL}/reflections`, { headers: { Authorization: `Bearer ${token}` } }),
-            fetch(`${API_BASE_URL}/users`, { headers: { Authorization: `Bearer ${token}` } }), // Assuming endpoint for all users
-            fetch(`${API_BASE_URL}/herds`, { headers: { Authorization: `Bearer ${token}` } }),
+            apiFetch("/reflections", token),
+            apiFetch("/users", token), // Assuming endpoint for all users
+            apiFetch("/herds", token),
           ]);
 
           if (reflectionsRes.ok) {
-            const reflectionsData = await reflectionsRes.json();
+            const reflectionsData = await readBody(reflectionsRes);
             console.log("Fetched reflections for History Page:", reflectionsData);
             setReflections(reflectionsData);
           }
-          if (usersRes.ok) setAllUsers(await usersRes.json());
-          if (herdsRes.ok) setAllHerds(await herdsRes.json());
+          if (usersRes.ok) setAllUsers(await readBody(usersRes));
+          if (herdsRes.ok) setAllHerds(await readBody(herdsRes));
 
         } catch (error) {
           console.error("Failed to fetch history data:", error);
@@ -2,6 +2,7 @@
 
 import { useEffect, useState } from "react";
 import { useAuth } from "@/context/AuthContext";
+import { apiFetch, readBody } from "@/lib/api";
 import { Button } from "@/components/ui/button";
 import { Card, CardContent, CardDescription, CardHeader, CardTitle } from "@/components/ui/card";
 import { Link, useNavigate } from "react-router-dom";
@@ -16,8 +17,6 @@ interface Reflection {
   createdAt: string;
 }
 
-const API_BASE_URL = `${import.meta.env.VITE_API_URL}`;
-
 const HomePage = () => {
   const { user, logout, token } = useAuth();
   const navigate = useNavigate();
@@ -27,11 +26,9 @@ const HomePage = () => {
     const fetchLatestReflection = async () => {
       if (user && token) {
         try {
-          const response = await fetch(`${API_BASE_URL}/reflections`, {
-            headers: { Authorization: `Bearer ${token}` },
-          });
+          const response = await apiFetch("/reflections", token);
           if (response.ok) {
-            const reflections = await response.json();
+            const reflections = await readBody(response);
             if (reflections.length > 0) {
               setLatestReflection(reflections[0]);
             }
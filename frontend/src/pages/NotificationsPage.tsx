@@ -2,6 +2,7 @@
 
 import { useEffect, useState } from "react";
 import { useAuth } from "@/context/AuthContext";
+import { apiFetch, readBody } from "@/lib/api";
 import { showError, showSuccess } from "@/utils/toast";
 import { Button } from "@/components/ui/button";
 
@@ -25,11 +26,9 @@ const NotificationsPage = () => {
     const fetchNotifications = async () => {
       if (user && token) {
         try {
-          const response = await fetch(`${API_BASE_URL}/notifications`, {
-            headers: { Authorization: `Bearer ${token}` },
-          });
+          const response = await apiFetch("/notifications", token);
           if (response.ok) {
-            setNotifications(await response.json());
+            setNotifications(await readBody(response));
           } else {
             showError("Failed to fetch notifications.");
           }